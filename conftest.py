@@ -12,6 +12,8 @@ from appium.options.android import UiAutomator2Options
 
 from tests.utils.adb import wait_for_boot, list_connected_devices
 
+pytest_plugins = ["pytester", "tests.utils.step_profiler", "tests.utils.result_cache"]
+
 
 def _ensure_allure_env(config: pytest.Config) -> None:
     """
@@ -0,0 +1,369 @@
+"""
+Plugin de pytest que cachea el resultado de los tests de API en modo mock.
+
+Con `--result-cache`, cada test determinístico (marcador `api` con
+REQRES_USE_MOCK activo y sin `driver`) se identifica con un hash de:
+su código, el de las fixtures, funciones, clases y módulos del proyecto
+que usa (recursivamente), el valor de las constantes que referencia, las
+variables REQRES_*, conftest.py/pytest.ini y las versiones de los paquetes
+instalados. Si algo referenciado no se puede incluir en el hash, el test
+no se cachea. Si el hash coincide con el de una corrida anterior
+que pasó, el test se saltea informando el resultado cacheado.
+
+Sólo se guardan resultados `passed`: un test que falló o fue salteado se
+vuelve a correr siempre. Los tests live (mock apagado) y los mobile nunca
+se cachean.
+"""
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import sys
+import time
+import types
+import warnings
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import pytest
+import allure
+
+
+_HIT_KEY = pytest.StashKey[dict]()
+_FINGERPRINT_KEY = pytest.StashKey[str]()
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("result-cache", "cache de resultados de tests de API en modo mock")
+    group.addoption(
+        "--result-cache",
+        action="store_true",
+        default=False,
+        help="Saltear los tests de API (mock) cuyo código y dependencias no cambiaron desde que pasaron.",
+    )
+    group.addoption(
+        "--result-cache-dir",
+        default=".result-cache",
+        help="Directorio donde se guardan los resultados cacheados (default .result-cache).",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    if config.getoption("--result-cache"):
+        config.pluginmanager.register(ResultCache(config), "result_cache")
+
+
+def _mock_enabled() -> bool:
+    return os.getenv("REQRES_USE_MOCK", "true").lower() in ("1", "true", "yes")
+
+
+def _is_cacheable(item: pytest.Item) -> bool:
+    if not isinstance(item, pytest.Function):
+        return False
+    if item.get_closest_marker("api") is None or not _mock_enabled():
+        return False
+    return "driver" not in item.fixturenames
+
+
+class _Uncacheable(Exception):
+    """El test referencia algo cuyo contenido no se puede incluir en el hash."""
+
+
+def _source(obj) -> str:
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        raise _Uncacheable(f"sin código fuente para {obj!r}")
+
+
+def _referenced_names(code: types.CodeType) -> Set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _referenced_names(const)
+    return names
+
+
+def _stable_repr(value) -> str:
+    """Serialización estable de constantes; las colecciones se ordenan."""
+    if isinstance(value, (str, int, float, bool, bytes, type(None))):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        items = ", ".join(_stable_repr(v) for v in value)
+        return f"{type(value).__name__}[{items}]"
+    if isinstance(value, (set, frozenset)):
+        items = ", ".join(sorted(_stable_repr(v) for v in value))
+        return f"{type(value).__name__}{{{items}}}"
+    if isinstance(value, dict):
+        items = ", ".join(sorted(f"{_stable_repr(k)}: {_stable_repr(v)}" for k, v in value.items()))
+        return f"dict{{{items}}}"
+    raise _Uncacheable(f"no se puede serializar {type(value).__qualname__}")
+
+
+def _top_level_bindings(source: str) -> Tuple[Set[str], Dict[str, Tuple[str, int]]]:
+    """Nombres asignados a nivel módulo y nombres importados con `from X import name`."""
+    assigned: Set[str] = set()
+    imported: Dict[str, Tuple[str, int]] = {}
+    for node in ast.parse(source).body:
+        targets: List[ast.AST] = []
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+            targets = [node.target]
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                imported[alias.asname or alias.name] = (node.module or "", node.level)
+        for target in targets:
+            for sub in ast.walk(target):
+                if isinstance(sub, ast.Name):
+                    assigned.add(sub.id)
+    return assigned, imported
+
+
+class _Fingerprinter:
+    """
+    Junta todo lo que determina el resultado de un test: el código completo de
+    cada módulo del proyecto (bajo rootpath) que alcanza, el de las funciones y
+    clases que referencia y el valor de las constantes que usa. Lo que viene de
+    fuera del proyecto queda cubierto por las versiones de los paquetes.
+    """
+
+    def __init__(self, rootpath: Path) -> None:
+        self.rootpath = rootpath.resolve()
+        self.parts: List[str] = []
+        self._seen: Set[int] = set()
+        self._modules: Dict[str, Tuple[Set[str], Dict[str, Tuple[str, int]]]] = {}
+
+    def _module_file(self, module_name: Optional[str]) -> Optional[Path]:
+        module = sys.modules.get(module_name or "")
+        path = getattr(module, "__file__", None)
+        if not path:
+            return None
+        path = Path(path).resolve()
+        if "site-packages" in path.parts or not path.is_relative_to(self.rootpath):
+            return None
+        return path
+
+    def add_module(self, module_name: str) -> None:
+        path = self._module_file(module_name)
+        if path is None or module_name in self._modules:
+            return
+        source = path.read_text(encoding="utf-8")
+        self._modules[module_name] = _top_level_bindings(source)
+        self.parts.append(f"module {module_name}\n{source}")
+
+    def add_function(self, func) -> None:
+        func = inspect.unwrap(func)
+        if id(func) in self._seen:
+            return
+        self._seen.add(id(func))
+        self.parts.append(_source(func))
+        self.add_module(func.__module__)
+        module_globals = func.__globals__
+        for name in sorted(_referenced_names(func.__code__)):
+            if name in module_globals:
+                self.add_global(func.__module__, name, module_globals[name])
+
+    def add_class(self, cls: type) -> None:
+        if id(cls) in self._seen:
+            return
+        self._seen.add(id(cls))
+        self.parts.append(_source(cls))
+        self.add_module(cls.__module__)
+        for attr in vars(cls).values():
+            if isinstance(attr, (staticmethod, classmethod)):
+                attr = attr.__func__
+            if isinstance(attr, property):
+                for accessor in (attr.fget, attr.fset, attr.fdel):
+                    if accessor is not None:
+                        self.add_function(accessor)
+            elif inspect.isfunction(attr):
+                self.add_function(attr)
+
+    def add_global(self, module_name: str, name: str, value) -> None:
+        if isinstance(value, types.ModuleType):
+            self.add_module(value.__name__)
+            self.parts.append(f"{name}=module {value.__name__}")
+            return
+        if inspect.isfunction(value) or inspect.isclass(value):
+            if self._module_file(value.__module__) is None:
+                self.parts.append(f"{name}={value.__module__}.{value.__qualname__}")
+            elif inspect.isclass(value):
+                self.add_class(value)
+            else:
+                self.add_function(value)
+            return
+        try:
+            self.parts.append(f"{name}={_stable_repr(value)}")
+            return
+        except _Uncacheable:
+            pass
+        self._add_instance(module_name, name, value)
+
+    def _add_instance(self, module_name: str, name: str, value) -> None:
+        # Una instancia (p. ej. un requests.Session) queda determinada por el
+        # código del módulo que la crea, si ese módulo ya está en el hash.
+        if module_name not in self._modules:
+            raise _Uncacheable(f"global {name!r} de {module_name} no se puede fingerprintear")
+        assigned, imported = self._modules[module_name]
+        if name in assigned:
+            self.parts.append(f"{name}=<{type(value).__qualname__}>")
+            return
+        if name in imported:
+            origin, level = imported[name]
+            package = sys.modules[module_name].__package__ if level else None
+            origin = importlib.util.resolve_name("." * level + origin, package) if level else origin
+            if self._module_file(origin) is None:
+                self.parts.append(f"{name}=<{type(value).__qualname__}> de {origin}")
+            else:
+                self.add_module(origin)
+                self._add_instance(origin, name, value)
+            return
+        raise _Uncacheable(f"global {name!r} de {module_name} no se puede fingerprintear")
+
+
+def _environment_fingerprint(config: pytest.Config) -> str:
+    env = sorted((k, v) for k, v in os.environ.items() if k.startswith("REQRES_"))
+    dists = sorted(
+        f"{d.metadata['Name']}=={d.version}".lower() for d in metadata.distributions() if d.metadata["Name"]
+    )
+    # Hooks y opciones también cambian resultados: conftest.py, los plugins
+    # del proyecto (incluido éste) y el archivo de configuración de pytest.
+    files = {Path(__file__).resolve()}
+    if config.inipath:
+        files.add(Path(config.inipath).resolve())
+    for plugin in config.pluginmanager.get_plugins():
+        path = getattr(plugin, "__file__", None)
+        if isinstance(plugin, types.ModuleType) and path:
+            path = Path(path).resolve()
+            if path.is_relative_to(config.rootpath.resolve()) and "site-packages" not in path.parts:
+                files.add(path)
+    sources = [(str(p), p.read_text(encoding="utf-8")) for p in sorted(files) if p.is_file()]
+    return json.dumps({"python": sys.version, "env": env, "dists": dists, "files": sources})
+
+
+class ResultCache:
+    def __init__(self, config: pytest.Config) -> None:
+        self.config = config
+        self.path = os.path.join(config.getoption("--result-cache-dir"), "results.json")
+        self.entries: Dict[str, dict] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+        self._env: Optional[str] = None
+        self._outcomes: Dict[str, List[str]] = {}
+        self.hits = 0
+        self.stored = 0
+        self.uncacheable = 0
+        self.pruned = 0
+        self._collected: Set[str] = set()
+        self._collected_files: Set[str] = set()
+
+    def fingerprint(self, item: pytest.Function) -> str:
+        if self._env is None:
+            # Se calcula después de la colección, cuando ya se cargaron todos los conftest.
+            self._env = _environment_fingerprint(self.config)
+        fp = _Fingerprinter(self.config.rootpath)
+        fp.parts += [item.nodeid, self._env]
+        fp.add_function(item.obj)
+        for name in sorted(item._fixtureinfo.name2fixturedefs):
+            for fixturedef in item._fixtureinfo.name2fixturedefs[name]:
+                fp.add_global(fixturedef.func.__module__, f"fixture {name}", fixturedef.func)
+        callspec = getattr(item, "callspec", None)
+        if callspec is not None:
+            fp.parts.append(_stable_repr(callspec.params))
+        return hashlib.sha256("\n".join(fp.parts).encode("utf-8")).hexdigest()
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_setup(self, item: pytest.Item) -> None:
+        if not _is_cacheable(item):
+            return
+        try:
+            fp = self.fingerprint(item)
+        except _Uncacheable as e:
+            self.uncacheable += 1
+            item.warn(pytest.PytestWarning(f"result-cache: no se cachea ({e})"))
+            return
+        item.stash[_FINGERPRINT_KEY] = fp
+        entry = self.entries.get(item.nodeid)
+        if not entry or entry.get("fingerprint") != fp or entry.get("outcome") != "passed":
+            return
+        item.stash[_HIT_KEY] = entry
+        self.hits += 1
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.get("timestamp", 0)))
+        msg = f"result-cache: {entry['outcome']} el {when} (fingerprint {fp[:12]}, sin cambios)"
+        allure.dynamic.tag("result-cache")
+        allure.attach(msg, name="result-cache", attachment_type=allure.attachment_type.TEXT)
+        pytest.skip(msg)
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item: pytest.Item, call: pytest.CallInfo):
+        rep = yield
+        if _HIT_KEY in item.stash:
+            rep.result_cache_hit = True
+            return rep
+        if _FINGERPRINT_KEY not in item.stash:
+            return rep
+        outcomes = self._outcomes.setdefault(item.nodeid, [])
+        outcomes.append(rep.outcome)
+        if rep.when != "teardown":
+            return rep
+        del self._outcomes[item.nodeid]
+        if outcomes == ["passed"] * 3:
+            self.entries[item.nodeid] = {
+                "fingerprint": item.stash[_FINGERPRINT_KEY],
+                "outcome": "passed",
+                "timestamp": time.time(),
+            }
+            self.stored += 1
+        else:
+            self.entries.pop(item.nodeid, None)
+        return rep
+
+    def pytest_report_teststatus(self, report, config):
+        if getattr(report, "result_cache_hit", False) and report.when == "setup":
+            return "cached", "c", "CACHED"
+        return None
+
+    def pytest_itemcollected(self, item: pytest.Item) -> None:
+        # Se registra antes de -k/-m: un test deseleccionado sigue existiendo.
+        self._collected.add(item.nodeid)
+
+    def pytest_collectreport(self, report: pytest.CollectReport) -> None:
+        if report.passed and "::" not in report.nodeid and report.nodeid.endswith(".py"):
+            self._collected_files.add(report.nodeid)
+
+    def _prune(self) -> None:
+        """Borra entradas de tests renombrados o eliminados."""
+        # Un módulo pedido como `archivo.py::test` no se colecta entero.
+        partial = {arg.split("::")[0] for arg in self.config.args if "::" in arg}
+        partial = {self.config.invocation_params.dir.joinpath(p).resolve() for p in partial}
+        for nodeid in list(self.entries):
+            file = nodeid.split("::")[0]
+            path = self.config.rootpath / file
+            stale = not path.exists() or (
+                file in self._collected_files and path.resolve() not in partial and nodeid not in self._collected
+            )
+            if stale:
+                del self.entries[nodeid]
+                self.pruned += 1
+
+    def pytest_sessionfinish(self, session, exitstatus) -> None:
+        self._prune()
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+        except OSError as e:
+            warnings.warn(pytest.PytestWarning(f"result-cache: no se pudo guardar {self.path}: {e}"))
+
+    def pytest_terminal_summary(self, terminalreporter, exitstatus, config) -> None:
+        terminalreporter.write_sep(
+            "-", f"result-cache: {self.hits} hits, {self.stored} resultados guardados en {self.path}, "
+            f"{self.uncacheable} no cacheables, {self.pruned} entradas obsoletas borradas"
+        )
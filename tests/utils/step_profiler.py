@@ -0,0 +1,299 @@
+"""
+Plugin de pytest que mide la duración de cada `allure.step` y de cada
+fixture (setup y teardown), y aplica presupuestos de tiempo por test.
+
+Uso en los tests:
+
+    @pytest.mark.budget(ms=5000)                      # total del test (setup + call)
+    @pytest.mark.budget(step="GET *", ms=800)         # cada step cuyo título matchee
+    @pytest.mark.budget(fixture="driver", ms=60000)   # setup de una fixture
+
+Opciones:
+    --step-profile             imprime un resumen con los steps más lentos
+    --step-profile-top=N       cantidad de filas del resumen (default 15)
+    --budget-mode=warn|fail    qué hacer si se excede un presupuesto
+    --budget-profile=DIR       corre cProfile (setup + test) en los tests con
+                               presupuesto y guarda el .prof de los que lo exceden
+"""
+import cProfile
+import fnmatch
+import io
+import os
+import pstats
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+import allure
+from allure_commons import hookimpl as allure_hookimpl
+from allure_commons import plugin_manager as allure_plugin_manager
+
+
+_BUDGET_MODES = ("warn", "fail")
+_BUDGETS_KEY = pytest.StashKey[List[Tuple[Optional[str], Optional[str], float]]]()
+
+# Profilers registrados en el plugin manager de allure, que es global al
+# proceso. Sólo el último (la sesión más interna, p. ej. una corrida de
+# pytester) recibe los steps; los anteriores se reactivan al terminar.
+_active_profilers: List["StepProfiler"] = []
+
+
+class BudgetExceededWarning(pytest.PytestWarning):
+    """Un test superó alguno de sus presupuestos de tiempo (modo warn)."""
+
+
+@dataclass
+class _Timing:
+    kind: str  # "step", "setup" o "teardown"
+    name: str
+    ms: float
+
+
+@dataclass
+class _ItemTimings:
+    timings: List[_Timing] = field(default_factory=list)
+    setup_ms: float = 0.0
+    call_ms: float = 0.0
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("step-profiler", "duración de allure.step y fixtures")
+    group.addoption(
+        "--step-profile",
+        action="store_true",
+        default=False,
+        help="Mostrar al final un resumen de los steps y fixtures más lentos.",
+    )
+    group.addoption(
+        "--step-profile-top",
+        type=int,
+        default=15,
+        help="Cantidad de filas del resumen de --step-profile (default 15).",
+    )
+    group.addoption(
+        "--budget-mode",
+        choices=_BUDGET_MODES,
+        default=None,
+        help="warn: emitir un warning si se excede un presupuesto; fail: fallar el test.",
+    )
+    group.addoption(
+        "--budget-profile",
+        default=None,
+        metavar="DIR",
+        help="Correr cProfile (setup + test) en los tests con @pytest.mark.budget y "
+             "guardar en DIR el perfil de los que exceden su presupuesto.",
+    )
+    parser.addini("budget_mode", "Modo por defecto de los presupuestos (warn|fail).", default="warn")
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    profiler = StepProfiler(config)
+    config.pluginmanager.register(profiler, "step_profiler")
+    if _active_profilers:
+        allure_plugin_manager.unregister(_active_profilers[-1])
+    _active_profilers.append(profiler)
+    allure_plugin_manager.register(profiler)
+
+
+def pytest_unconfigure(config: pytest.Config) -> None:
+    profiler = config.pluginmanager.get_plugin("step_profiler")
+    if profiler is None:
+        return
+    config.pluginmanager.unregister(profiler)
+    if allure_plugin_manager.is_registered(profiler):
+        allure_plugin_manager.unregister(profiler)
+    if profiler in _active_profilers:
+        _active_profilers.remove(profiler)
+        if _active_profilers and not allure_plugin_manager.is_registered(_active_profilers[-1]):
+            allure_plugin_manager.register(_active_profilers[-1])
+
+
+def _parse_budgets(item: pytest.Item) -> List[Tuple[Optional[str], Optional[str], float]]:
+    """Devuelve (step, fixture, ms) por cada marcador budget del test."""
+    out = []
+    for mark in item.iter_markers(name="budget"):
+        ms = mark.kwargs.get("ms", mark.args[0] if mark.args else None)
+        if ms is None:
+            raise pytest.UsageError(f"{item.nodeid}: @pytest.mark.budget requiere ms=")
+        try:
+            ms = float(ms)
+        except (TypeError, ValueError):
+            raise pytest.UsageError(f"{item.nodeid}: @pytest.mark.budget ms={ms!r} no es un número")
+        step = mark.kwargs.get("step")
+        fixture = mark.kwargs.get("fixture")
+        if step and fixture:
+            raise pytest.UsageError(f"{item.nodeid}: @pytest.mark.budget acepta step= o fixture=, no ambos")
+        out.append((step, fixture, ms))
+    return out
+
+
+class StepProfiler:
+    def __init__(self, config: pytest.Config) -> None:
+        self.config = config
+        self.mode = config.getoption("--budget-mode") or config.getini("budget_mode") or "warn"
+        if self.mode not in _BUDGET_MODES:
+            raise pytest.UsageError(f"budget_mode inválido: {self.mode!r} (usar warn o fail)")
+        self.profile_dir = config.getoption("--budget-profile")
+        if self.profile_dir:
+            try:
+                os.makedirs(self.profile_dir, exist_ok=True)
+            except OSError as e:
+                raise pytest.UsageError(f"--budget-profile: no se puede crear {self.profile_dir!r} ({e})")
+        self._item: Optional[pytest.Item] = None
+        self._open_steps: Dict[str, Tuple[str, float]] = {}
+        self._teardown_started: Dict[int, float] = {}
+        self._by_item: Dict[str, _ItemTimings] = {}
+        self._violations: List[Tuple[str, str]] = []
+        self._cprofile: Optional[cProfile.Profile] = None
+
+    def _record(self, kind: str, name: str, ms: float) -> None:
+        if self._item is None:
+            return
+        self._by_item.setdefault(self._item.nodeid, _ItemTimings()).timings.append(_Timing(kind, name, ms))
+
+    def pytest_collection_modifyitems(self, session, config, items) -> None:
+        # Un marcador mal escrito corta la sesión antes de correr cualquier test.
+        for item in items:
+            item.stash[_BUDGETS_KEY] = _parse_budgets(item)
+
+    # --- allure.step ---
+
+    @allure_hookimpl
+    def start_step(self, uuid, title, params):
+        self._open_steps[uuid] = (title, time.perf_counter())
+
+    @allure_hookimpl
+    def stop_step(self, uuid, exc_type, exc_val, exc_tb):
+        started = self._open_steps.pop(uuid, None)
+        if started:
+            title, t0 = started
+            self._record("step", title, (time.perf_counter() - t0) * 1000)
+
+    # --- fixtures ---
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_fixture_setup(self, fixturedef: pytest.FixtureDef, request: pytest.FixtureRequest):
+        t0 = time.perf_counter()
+        try:
+            result = yield
+        finally:
+            self._record("setup", fixturedef.argname, (time.perf_counter() - t0) * 1000)
+        # Se registra después del finalizer propio de la fixture, así que
+        # corre antes que él y marca el inicio del teardown.
+        fixturedef.addfinalizer(lambda: self._teardown_started.__setitem__(id(fixturedef), time.perf_counter()))
+        return result
+
+    def pytest_fixture_post_finalizer(self, fixturedef: pytest.FixtureDef, request: pytest.FixtureRequest) -> None:
+        t0 = self._teardown_started.pop(id(fixturedef), None)
+        if t0 is not None:
+            self._record("teardown", fixturedef.argname, (time.perf_counter() - t0) * 1000)
+
+    # --- ciclo de vida del test ---
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_setup(self, item: pytest.Item):
+        self._item = item
+        if self.profile_dir and item.stash.get(_BUDGETS_KEY, None):
+            self._cprofile = cProfile.Profile()
+            try:
+                self._cprofile.enable()
+            except ValueError:
+                self._cprofile = None  # otro profiler activo (p. ej. coverage/IDE)
+        t0 = time.perf_counter()
+        try:
+            return (yield)
+        finally:
+            self._by_item.setdefault(item.nodeid, _ItemTimings()).setup_ms = (time.perf_counter() - t0) * 1000
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_call(self, item: pytest.Item):
+        budgets = item.stash.get(_BUDGETS_KEY, [])
+        t0 = time.perf_counter()
+        try:
+            result = yield
+        finally:
+            self._by_item.setdefault(item.nodeid, _ItemTimings()).call_ms = (time.perf_counter() - t0) * 1000
+            profiler = self._stop_cprofile()
+
+        # Sólo se evalúan presupuestos si el test pasó: un fallo real tiene prioridad.
+        violations = self._check_budgets(item, budgets)
+        if not violations:
+            return result
+        if profiler is not None:
+            self._dump_profile(item, profiler)
+        msg = "Presupuesto de tiempo excedido:\n" + "\n".join(f"  - {v}" for v in violations)
+        if self.mode == "fail":
+            pytest.fail(msg, pytrace=False)
+        item.warn(BudgetExceededWarning(msg))
+        return result
+
+    def pytest_runtest_logfinish(self, nodeid: str, location) -> None:
+        # Si el setup falló no hubo call: el profiler puede seguir activo.
+        self._stop_cprofile()
+        self._item = None
+
+    def _stop_cprofile(self) -> Optional[cProfile.Profile]:
+        profiler, self._cprofile = self._cprofile, None
+        if profiler is not None:
+            profiler.disable()
+        return profiler
+
+    def _check_budgets(self, item: pytest.Item, budgets) -> List[str]:
+        data = self._by_item.get(item.nodeid, _ItemTimings())
+        out = []
+        for step, fixture, limit in budgets:
+            if step:
+                for t in data.timings:
+                    if t.kind == "step" and fnmatch.fnmatchcase(t.name, step) and t.ms > limit:
+                        out.append(f"step {t.name!r}: {t.ms:.0f} ms > {limit:.0f} ms")
+            elif fixture:
+                for t in data.timings:
+                    if t.kind == "setup" and t.name == fixture and t.ms > limit:
+                        out.append(f"setup de fixture {fixture!r}: {t.ms:.0f} ms > {limit:.0f} ms")
+            else:
+                total = data.setup_ms + data.call_ms
+                if total > limit:
+                    out.append(f"total del test: {total:.0f} ms > {limit:.0f} ms")
+        for v in out:
+            self._violations.append((item.nodeid, v))
+        return out
+
+    def _dump_profile(self, item: pytest.Item, profiler: cProfile.Profile) -> None:
+        fname = re.sub(r"[^\w.-]+", "_", item.nodeid) + ".prof"
+        path = os.path.join(self.profile_dir, fname)
+        try:
+            profiler.dump_stats(path)
+        except OSError as e:
+            item.warn(pytest.PytestWarning(f"No se pudo guardar el perfil en {path}: {e}"))
+            return
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats("cumulative").print_stats(30)
+        allure.attach(buf.getvalue(), name="cProfile", attachment_type=allure.attachment_type.TEXT)
+
+    # --- resumen ---
+
+    def pytest_terminal_summary(self, terminalreporter, exitstatus, config: pytest.Config) -> None:
+        if self._violations:
+            terminalreporter.write_sep("=", f"presupuestos excedidos ({self.mode})")
+            for nodeid, v in self._violations:
+                terminalreporter.write_line(f"{nodeid}: {v}")
+        if not config.getoption("--step-profile"):
+            return
+
+        agg: Dict[Tuple[str, str], List[float]] = {}
+        for data in self._by_item.values():
+            for t in data.timings:
+                agg.setdefault((t.kind, t.name), []).append(t.ms)
+        if not agg:
+            return
+        rows = sorted(agg.items(), key=lambda kv: sum(kv[1]), reverse=True)
+        rows = rows[: config.getoption("--step-profile-top")]
+
+        terminalreporter.write_sep("=", "steps y fixtures más lentos")
+        terminalreporter.write_line(f"{'total ms':>10} {'max ms':>10} {'n':>4}  {'tipo':<8} nombre")
+        for (kind, name), values in rows:
+            terminalreporter.write_line(
+                f"{sum(values):>10.0f} {max(values):>10.0f} {len(values):>4}  {kind:<8} {name}"
+            )
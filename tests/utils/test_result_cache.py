@@ -0,0 +1,253 @@
+import json
+import sys
+
+import pytest
+
+
+PLUGIN = "tests.utils.result_cache"
+
+TEST_MODULE = """
+import pytest
+from helpers import helper_value
+
+IDS = [2]
+
+@pytest.fixture
+def numero():
+    return 2
+
+def _doble(x):
+    return x * 2
+
+@pytest.mark.api
+def test_cacheable(numero):
+    assert _doble(numero) == 4
+    assert IDS == [2]
+    assert helper_value() == 2
+"""
+
+HELPERS = """
+def helper_value():
+    return 2
+"""
+
+
+@pytest.fixture
+def run(pytester: pytest.Pytester, monkeypatch: pytest.MonkeyPatch):
+    # Los módulos se reescriben entre corridas con el mismo tamaño: sin .pyc
+    # no se reutiliza bytecode viejo.
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    monkeypatch.setenv("REQRES_USE_MOCK", "true")
+    pytester.syspathinsert()
+    pytester.makeini(
+        """
+        [pytest]
+        markers =
+            api: pruebas de API
+        """
+    )
+
+    def _run(*args):
+        return pytester.runpytest("-p", PLUGIN, "-p", "no:cacheprovider", "--result-cache", *args)
+
+    return _run
+
+
+def _cached(result) -> int:
+    return result.parseoutcomes().get("cached", 0)
+
+
+def _stored(pytester: pytest.Pytester) -> dict:
+    path = pytester.path / ".result-cache" / "results.json"
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def test_hit_on_second_run(pytester, run):
+    pytester.makepyfile(test_mod=TEST_MODULE, helpers=HELPERS)
+    run().assert_outcomes(passed=1)
+    result = run("-rs")
+    assert _cached(result) == 1
+    result.assert_outcomes()
+    result.stdout.fnmatch_lines(["*result-cache: 1 hits*"])
+
+
+@pytest.mark.parametrize(
+    "filename, old, new, outcome",
+    [
+        ("test_mod", "    assert _doble(numero) == 4\n", "    assert _doble(numero) >= 4\n", "passed"),
+        ("test_mod", "    return 2\n", "    return 3\n", "failed"),
+        ("test_mod", "return x * 2", "return x + x", "passed"),
+        ("test_mod", "IDS = [2]", "IDS = [3]", "failed"),
+        ("helpers", "return 2", "return 3", "failed"),
+    ],
+    ids=["test-body", "fixture", "helper", "module-constant", "imported-helper"],
+)
+def test_invalidated_on_change(pytester, run, filename, old, new, outcome):
+    files = {"test_mod": TEST_MODULE, "helpers": HELPERS}
+    pytester.makepyfile(**files)
+    run().assert_outcomes(passed=1)
+
+    assert old in files[filename]
+    files[filename] = files[filename].replace(old, new)
+    pytester.makepyfile(**files)
+    result = run()
+    assert _cached(result) == 0
+    result.assert_outcomes(**{outcome: 1})
+
+
+def test_invalidated_on_reqres_env_change(pytester, run, monkeypatch):
+    pytester.makepyfile(test_mod=TEST_MODULE, helpers=HELPERS)
+    run().assert_outcomes(passed=1)
+    monkeypatch.setenv("REQRES_BASE_URL", "http://localhost:9999")
+    result = run()
+    assert _cached(result) == 0
+    result.assert_outcomes(passed=1)
+
+
+def test_invalidated_on_conftest_change(pytester, run):
+    pytester.makepyfile(test_mod=TEST_MODULE, helpers=HELPERS)
+    pytester.makeconftest("")
+    run().assert_outcomes(passed=1)
+    pytester.makeconftest("# cambio\n")
+    result = run()
+    assert _cached(result) == 0
+    result.assert_outcomes(passed=1)
+
+
+def test_live_mode_is_never_cached(pytester, run, monkeypatch):
+    monkeypatch.setenv("REQRES_USE_MOCK", "false")
+    pytester.makepyfile(test_mod=TEST_MODULE, helpers=HELPERS)
+    run().assert_outcomes(passed=1)
+    result = run()
+    assert _cached(result) == 0
+    result.assert_outcomes(passed=1)
+    assert _stored(pytester) == {}
+
+
+def test_driver_tests_are_never_cached(pytester, run):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.fixture
+        def driver():
+            return object()
+
+        @pytest.mark.api
+        def test_mobile(driver):
+            pass
+        """
+    )
+    run().assert_outcomes(passed=1)
+    result = run()
+    assert _cached(result) == 0
+    result.assert_outcomes(passed=1)
+    assert _stored(pytester) == {}
+
+
+def test_failed_and_skipped_are_never_stored(pytester, run):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        @pytest.mark.api
+        def test_fails():
+            assert False
+
+        @pytest.mark.api
+        def test_skips():
+            pytest.skip("proxy")
+
+        @pytest.fixture
+        def rompe_en_teardown():
+            yield
+            raise RuntimeError("teardown")
+
+        @pytest.mark.api
+        def test_teardown_error(rompe_en_teardown):
+            pass
+        """
+    )
+    run().assert_outcomes(failed=1, skipped=1, passed=1, errors=1)
+    result = run()
+    assert _cached(result) == 0
+    result.assert_outcomes(failed=1, skipped=1, passed=1, errors=1)
+    assert _stored(pytester) == {}
+
+
+def test_unfingerprintable_global_is_not_cached(pytester, run):
+    pytester.makepyfile(
+        """
+        import pytest
+
+        globals()["DINAMICO"] = object()
+
+        @pytest.mark.api
+        def test_dinamico():
+            assert DINAMICO is not None
+        """
+    )
+    result = run()
+    result.assert_outcomes(passed=1, warnings=1)
+    result.stdout.fnmatch_lines(["*result-cache: no se cachea*DINAMICO*"])
+    assert _stored(pytester) == {}
+
+
+def test_stale_entries_are_pruned(pytester, run):
+    pytester.makepyfile(
+        test_mod="""
+        import pytest
+
+        @pytest.mark.api
+        def test_viejo():
+            pass
+
+        @pytest.mark.api
+        def test_otro():
+            pass
+        """,
+        test_borrado="""
+        import pytest
+
+        @pytest.mark.api
+        def test_x():
+            pass
+        """,
+    )
+    run().assert_outcomes(passed=3)
+    assert sorted(_stored(pytester)) == [
+        "test_borrado.py::test_x",
+        "test_mod.py::test_otro",
+        "test_mod.py::test_viejo",
+    ]
+
+    # Con selección parcial o -k no se borra nada del módulo.
+    run("test_mod.py::test_otro")
+    run("-k", "otro")
+    assert len(_stored(pytester)) == 3
+
+    (pytester.path / "test_borrado.py").unlink()
+    pytester.makepyfile(
+        test_mod="""
+        import pytest
+
+        @pytest.mark.api
+        def test_nuevo():
+            pass
+
+        @pytest.mark.api
+        def test_otro():
+            pass
+        """
+    )
+    result = run()
+    result.stdout.fnmatch_lines(["*2 entradas obsoletas borradas*"])
+    assert sorted(_stored(pytester)) == ["test_mod.py::test_nuevo", "test_mod.py::test_otro"]
+
+
+def test_failed_cache_write_warns(pytester, run):
+    pytester.makepyfile(test_mod=TEST_MODULE, helpers=HELPERS)
+    pytester.makefile(".txt", ocupado="no soy un directorio")
+    result = run("--result-cache-dir=ocupado.txt/sub")
+    result.assert_outcomes(passed=1, warnings=1)
+    result.stdout.fnmatch_lines(["*result-cache: no se pudo guardar*"])
@@ -0,0 +1,238 @@
+import re
+
+import pytest
+import allure
+
+
+PLUGIN = "tests.utils.step_profiler"
+
+SLOW_FIXTURE = """
+import time
+import allure
+import pytest
+
+@pytest.fixture
+def slow():
+    time.sleep(0.05)
+    yield
+    time.sleep(0.05)
+"""
+
+
+@pytest.fixture
+def run(pytester: pytest.Pytester):
+    pytester.makeini(
+        """
+        [pytest]
+        markers =
+            budget: presupuesto de tiempo
+        """
+    )
+
+    def _run(*args):
+        return pytester.runpytest("-p", PLUGIN, "-p", "no:cacheprovider", *args)
+
+    return _run
+
+
+@pytest.mark.parametrize("mode", ["warn", "fail"])
+@pytest.mark.parametrize(
+    "marker, expected",
+    [
+        ('budget(step="lento*", ms=1)', "step 'lento uno'"),
+        ('budget(fixture="slow", ms=1)', "setup de fixture 'slow'"),
+        ("budget(ms=1)", "total del test"),
+    ],
+)
+def test_budget_exceeded(pytester, run, mode, marker, expected):
+    pytester.makepyfile(
+        SLOW_FIXTURE
+        + f"""
+@pytest.mark.{marker}
+def test_slow(slow):
+    with allure.step("lento uno"):
+        time.sleep(0.03)
+"""
+    )
+    result = run(f"--budget-mode={mode}")
+    if mode == "fail":
+        result.assert_outcomes(failed=1)
+        result.stdout.fnmatch_lines(["*Presupuesto de tiempo excedido*"])
+    else:
+        result.assert_outcomes(passed=1, warnings=1)
+        result.stdout.fnmatch_lines(["*BudgetExceededWarning*"])
+    result.stdout.fnmatch_lines([f"*presupuestos excedidos ({mode})*", f"*test_slow: {expected}*"])
+
+
+def test_budget_not_exceeded(pytester, run):
+    pytester.makepyfile(
+        SLOW_FIXTURE
+        + """
+@pytest.mark.budget(ms=60000)
+@pytest.mark.budget(step="lento*", ms=60000)
+@pytest.mark.budget(fixture="slow", ms=60000)
+def test_slow(slow):
+    with allure.step("lento uno"):
+        time.sleep(0.01)
+"""
+    )
+    result = run("--budget-mode=fail")
+    result.assert_outcomes(passed=1)
+    result.stdout.no_fnmatch_line("*presupuestos excedidos*")
+
+
+def test_ini_budget_mode(pytester, run):
+    pytester.makeini(
+        """
+        [pytest]
+        budget_mode = fail
+        markers =
+            budget: presupuesto de tiempo
+        """
+    )
+    pytester.makepyfile(
+        SLOW_FIXTURE
+        + """
+@pytest.mark.budget(ms=1)
+def test_slow(slow):
+    pass
+"""
+    )
+    run().assert_outcomes(failed=1)
+
+
+def test_real_failure_wins_over_budget(pytester, run):
+    pytester.makepyfile(
+        SLOW_FIXTURE
+        + """
+@pytest.mark.budget(ms=1)
+def test_slow(slow):
+    assert 1 == 2
+"""
+    )
+    result = run("--budget-mode=fail")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["*assert 1 == 2*"])
+    result.stdout.no_fnmatch_line("*Presupuesto de tiempo excedido*")
+
+
+def test_profile_written_only_for_over_budget(pytester, run):
+    pytester.makepyfile(
+        SLOW_FIXTURE
+        + """
+@pytest.mark.budget(fixture="slow", ms=1)
+def test_over(slow):
+    pass
+
+@pytest.mark.budget(ms=60000)
+def test_under(slow):
+    pass
+
+def test_no_budget(slow):
+    pass
+"""
+    )
+    result = run("--budget-profile=profiles")
+    result.assert_outcomes(passed=3, warnings=1)
+    profiles = sorted(p.name for p in (pytester.path / "profiles").iterdir())
+    assert profiles == ["test_profile_written_only_for_over_budget.py_test_over.prof"]
+
+
+def test_profile_covers_fixture_setup(pytester, run):
+    pytester.makepyfile(
+        SLOW_FIXTURE
+        + """
+@pytest.mark.budget(fixture="slow", ms=1)
+def test_over(slow):
+    pass
+"""
+    )
+    run("--budget-profile=profiles").assert_outcomes(passed=1, warnings=1)
+    import pstats
+
+    (prof,) = (pytester.path / "profiles").iterdir()
+    functions = {name for (_, _, name) in pstats.Stats(str(prof)).stats}
+    assert "slow" in functions
+
+
+def test_invalid_profile_dir_is_usage_error(pytester, run):
+    pytester.makefile(".txt", profiles="no soy un directorio")
+    pytester.makepyfile("def test_ok():\n    pass\n")
+    result = run("--budget-profile=profiles.txt")
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines(["*--budget-profile: no se puede crear*"])
+
+
+def test_step_profile_summary(pytester, run):
+    pytester.makepyfile(
+        SLOW_FIXTURE
+        + """
+def test_a(slow):
+    with allure.step("lento uno"):
+        time.sleep(0.03)
+
+def test_b():
+    with allure.step("lento uno"):
+        time.sleep(0.03)
+"""
+    )
+    result = run("--step-profile")
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(["*steps y fixtures más lentos*"])
+
+    rows = {}
+    for line in result.outlines:
+        m = re.match(r"\s*(\d+)\s+(\d+)\s+(\d+)\s+(step|setup|teardown)\s+(.+)$", line)
+        if m:
+            rows[(m.group(4), m.group(5))] = (int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    assert rows[("step", "lento uno")][2] == 2
+    assert rows[("step", "lento uno")][0] >= 50
+    assert rows[("setup", "slow")][1] >= 40
+    # El teardown se mide desde que arranca el finalizer de la fixture.
+    assert rows[("teardown", "slow")][1] >= 40
+
+
+@pytest.mark.parametrize(
+    "marker, message",
+    [
+        ("budget()", "requiere ms="),
+        ('budget(step="a", fixture="b", ms=5)', "step= o fixture=, no ambos"),
+        ('budget(ms="rápido")', "no es un número"),
+    ],
+)
+def test_invalid_budget_marker_stops_session(pytester, run, marker, message):
+    pytester.makepyfile(
+        f"""
+import pytest
+
+def test_first():
+    pass
+
+@pytest.mark.{marker}
+def test_bad():
+    pass
+"""
+    )
+    result = run()
+    assert result.ret == pytest.ExitCode.USAGE_ERROR
+    result.stderr.fnmatch_lines([f"*test_bad: @pytest.mark.budget*{message}*"])
+    result.stdout.no_fnmatch_line("*passed*")
+
+
+def test_nested_session_steps_not_recorded_by_outer(pytester, run, request):
+    pytester.makepyfile(
+        """
+import allure
+
+def test_inner():
+    with allure.step("paso interno"):
+        pass
+"""
+    )
+    run().assert_outcomes(passed=1)
+    with allure.step("paso externo"):
+        pass
+
+    outer = request.config.pluginmanager.get_plugin("step_profiler")
+    steps = [t.name for t in outer._by_item[request.node.nodeid].timings if t.kind == "step"]
+    assert steps == ["paso externo"]